@@ -15,39 +15,121 @@ Repository: https://github.com/Ruqing1963/Q47-Null-Sparse-Decomposition
 """
 
 import math
-import csv
 import os
+import sys
+
+import numpy as np
+
+from sieve_utils import sieve_primes
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the bitarray sieve is the fallback
+    njit = None
+
+# Landau-Ramanujan exponent 1 - delta for density delta = 1/46
+ALPHA = 45 / 46
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _effective_primes_kernel(D):
+        # Segmented odds-only sieve fused with the p ≡ 1 (mod 47) filter.
+        # One segment of 2^15 odds (32 KB of bytes) stays L1-resident while
+        # every base prime is applied to it, instead of streaming a D-sized
+        # array through the cache once per prime.
+        size = (D + 1) // 2  # index k <-> odd number 2k + 1
+        SEG = 1 << 15
+
+        root = int(np.sqrt(D))
+        while root * root > D:
+            root -= 1
+        while (root + 1) * (root + 1) <= D:
+            root += 1
+
+        # Base sieve: odd primes up to sqrt(D), with their next index to mark
+        bsize = (root + 1) // 2
+        base = np.ones(max(bsize, 1), np.bool_)
+        base[0] = False
+        for k in range(1, bsize):
+            if base[k]:
+                p = 2 * k + 1
+                for j in range(p * p // 2, bsize, p):
+                    base[j] = False
+        bp = np.empty(max(bsize, 1), np.int64)
+        nxt = np.empty(max(bsize, 1), np.int64)
+        nb = 0
+        for k in range(1, bsize):
+            if base[k]:
+                p = 2 * k + 1
+                bp[nb] = p
+                nxt[nb] = p * p // 2
+                nb += 1
+
+        out = np.empty(D // 47 + 1, np.int64)  # p ≡ 1 (mod 47) bound
+        m = 0
+        seg = np.empty(SEG, np.bool_)
+        low = 0
+        while low < size:
+            hi = min(low + SEG, size)
+            for t in range(hi - low):
+                seg[t] = True
+            if low == 0:
+                seg[0] = False  # 1 is not prime
+            for b in range(nb):
+                p = bp[b]
+                j = nxt[b]
+                while j < hi:
+                    seg[j - low] = False
+                    j += p
+                nxt[b] = j
+            for t in range(hi - low):
+                if seg[t]:
+                    p = 2 * (low + t) + 1
+                    if p % 47 == 1:
+                        out[m] = p
+                        m += 1
+            low = hi
+        return out[:m]
+
+
+def effective_primes(D: int) -> np.ndarray:
+    """Effective primes p ≤ D, i.e. p ≡ 1 (mod 47)."""
+    if njit is not None:
+        return _effective_primes_kernel(D)
+    primes = sieve_primes(D)
+    return primes[(primes - 1) % 47 == 0]
 
 
-def sieve_primes(n: int) -> list:
-    """Sieve of Eratosthenes up to n."""
-    is_prime = [True] * (n + 1)
-    is_prime[0] = is_prime[1] = False
-    for i in range(2, int(n**0.5) + 1):
-        if is_prime[i]:
-            for j in range(i * i, n + 1, i):
-                is_prime[j] = False
-    return [i for i in range(2, n + 1) if is_prime[i]]
-
-
-def count_effective_moduli(D: int) -> int:
+def count_effective_moduli(D: int, eff: np.ndarray = None) -> int:
     """
     Count integers q ∈ [1, D] all of whose prime factors are ≡ 1 (mod 47).
 
-    Uses a sieve: start with all numbers marked as effective,
-    then unmark any number divisible by a non-effective prime.
+    Enumerates Q_eff directly: every member is a product of effective
+    primes (p ≡ 1 mod 47), so a depth-first recursion over non-decreasing
+    prime factors visits each q ≤ D exactly once. Since
+    N_eff(D) ~ D/(log D)^{45/46}, this touches far fewer than D elements
+    and needs no D-sized mask at all.
+
+    An array of effective primes covering at least [1, D] may be passed
+    as `eff` to avoid re-sieving for every call.
     """
-    is_eff = [True] * (D + 1)
-    is_eff[0] = False  # 0 is not a positive integer
+    if eff is None:
+        eff = effective_primes(D)
+    eff_primes = eff[eff <= D].tolist()
 
-    primes = sieve_primes(D)
-    for p in primes:
-        if (p - 1) % 47 != 0:
-            # p is NOT an effective prime; remove all its multiples
-            for m in range(p, D + 1, p):
-                is_eff[m] = False
+    def extend(idx: int, prod: int) -> int:
+        # Count multiples of prod by primes eff_primes[idx:] staying <= D,
+        # including prod itself (q = 1 for the root call).
+        count = 1
+        for i in range(idx, len(eff_primes)):
+            nxt = prod * eff_primes[i]
+            if nxt > D:
+                break
+            count += extend(i, nxt)
+        return count
 
-    return sum(is_eff)
+    return extend(0, 1)
 
 
 def main():
@@ -65,18 +147,23 @@ def main():
           f"{'Ratio':>8}  {'D fraction':>12}")
     print("-" * 65)
 
+    # Sieve once at the largest checkpoint; smaller D reuse a prefix
+    eff_all = effective_primes(max(checkpoints))
+
     results = []
+    lines = []  # table rows, flushed in one write after the loop
     for D in checkpoints:
-        N = count_effective_moduli(D)
-        asymp = D / math.log(D) ** (45 / 46)
+        N = count_effective_moduli(D, eff_all)
+        asymp = D / math.log(D) ** ALPHA
         ratio = N / asymp if asymp > 0 else 0
         frac = N / D * 100
 
-        print(f"{D:>10,}  {N:>10,}  {asymp:>16,.2f}  "
-              f"{ratio:>8.4f}  {frac:>10.4f}%")
+        lines.append(f"{D:>10,}  {N:>10,}  {asymp:>16,.2f}  "
+                     f"{ratio:>8.4f}  {frac:>10.4f}%")
 
         results.append((D, N, asymp, ratio, frac))
 
+    sys.stdout.write("\n".join(lines) + "\n")
     print("-" * 65)
 
     # Null fraction
@@ -87,33 +174,35 @@ def main():
         print(f"  D = {D:>10,}: {null_pct:.2f}% of moduli contribute "
               f"zero to BV error")
 
-    # Verify the exponent
+    # Verify the exponent by least squares over every checkpoint:
+    # N_eff(D) ~ C * D / (log D)^alpha
+    # log(N/D) ~ log(C) - alpha * log(log(D))
     print()
-    print("Exponent verification (log-log fit):")
-    D1, N1 = results[-2][0], results[-2][1]
-    D2, N2 = results[-1][0], results[-1][1]
-    if N1 > 0 and N2 > 0:
-        # N_eff(D) ~ C * D / (log D)^alpha
-        # log(N/D) ~ log(C) - alpha * log(log(D))
-        x1 = math.log(math.log(D1))
-        x2 = math.log(math.log(D2))
-        y1 = math.log(N1 / D1)
-        y2 = math.log(N2 / D2)
-        alpha_fit = -(y2 - y1) / (x2 - x1)
-        print(f"  Fitted exponent alpha = {alpha_fit:.4f}")
-        print(f"  Theoretical value     = {45/46:.4f} = 45/46")
-        print(f"  Relative error        = {abs(alpha_fit - 45/46)/(45/46)*100:.2f}%")
-
-    # Save CSV
+    print("Exponent verification (log-log least-squares fit):")
+    Ds = np.array([r[0] for r in results], dtype=float)
+    Ns = np.array([r[1] for r in results], dtype=float)
+    mask = Ns > 0
+    x = np.log(np.log(Ds[mask]))
+    y = np.log(Ns[mask] / Ds[mask])
+    slope, intercept = np.polyfit(x, y, 1)
+    alpha_fit = -slope
+    C_fit = math.exp(intercept)
+    print(f"  Fitted exponent alpha = {alpha_fit:.4f}  "
+          f"(all {int(mask.sum())} checkpoints)")
+    print(f"  Fitted constant C     = {C_fit:.4f}")
+    print(f"  Theoretical value     = {ALPHA:.4f} = 45/46")
+    print(f"  Relative error        = {abs(alpha_fit - ALPHA)/ALPHA*100:.2f}%")
+
+    # Save CSV in a single formatted write
     os.makedirs("data", exist_ok=True)
-    with open("data/effective_moduli_count.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["# N_eff(D) = #{q ≤ D : q ∈ Q_eff}"])
-        writer.writerow(["D", "N_eff", "Asymptotic_D_over_logD_45_46",
-                         "Ratio", "Fraction_percent"])
-        for D, N, asymp, ratio, frac in results:
-            writer.writerow([D, N, f"{asymp:.2f}", f"{ratio:.4f}",
-                           f"{frac:.4f}"])
+    rows = np.array([(str(D), str(N), f"{asymp:.2f}", f"{ratio:.4f}",
+                      f"{frac:.4f}")
+                     for D, N, asymp, ratio, frac in results], dtype=str)
+    np.savetxt("data/effective_moduli_count.csv", rows, fmt="%s",
+               delimiter=",", comments="",
+               header="# N_eff(D) = #{q ≤ D : q ∈ Q_eff}\n"
+                      "D,N_eff,Asymptotic_D_over_logD_45_46,"
+                      "Ratio,Fraction_percent")
     print("\n  Results saved to data/effective_moduli_count.csv")
 
 